@@ -1,324 +1,424 @@
-#!/usr/bin/env python3
-import json
-import socket
-import threading
-import time
-import traceback
-from urllib.parse import urlparse, parse_qs
-
-HOST = "127.0.0.1"
-PORT = 8080
-
-# Simple in-memory store (resets on restart)
-STATE = {
-    "todos": [],   # list of {"id": int, "text": str, "done": bool, "created_at": float}
-    "next_id": 1,
-    "started_at": time.time(),
-}
-
-# ---------- HTTP helpers ----------
-
-REASONS = {
-    200: "OK",
-    201: "Created",
-    204: "No Content",
-    400: "Bad Request",
-    404: "Not Found",
-    405: "Method Not Allowed",
-    422: "Unprocessable Entity",
-    500: "Internal Server Error",
-}
-
-def http_response(status: int, body: bytes = b"", headers: dict | None = None) -> bytes:
-    headers = headers or {}
-    reason = REASONS.get(status, "OK")
-    base_headers = {
-        "Server": "mini-server",
-        "Connection": "close",
-        "Content-Length": str(len(body)),
-    }
-    # Default content-type
-    if "Content-Type" not in headers and body:
-        base_headers["Content-Type"] = "text/plain; charset=utf-8"
-    base_headers.update(headers)
-
-    head = f"HTTP/1.1 {status} {reason}\r\n"
-    for k, v in base_headers.items():
-        head += f"{k}: {v}\r\n"
-    head += "\r\n"
-    return head.encode("utf-8") + body
-
-def json_response(status: int, obj) -> bytes:
-    body = json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
-    return http_response(status, body, {"Content-Type": "application/json; charset=utf-8"})
-
-def parse_request(raw: bytes):
-    """
-    Very small HTTP/1.1 parser (good enough for learning + portfolio).
-    Returns: method, path, query_dict, headers_dict, body_bytes
-    """
-    try:
-        header_blob, body = raw.split(b"\r\n\r\n", 1)
-    except ValueError:
-        raise ValueError("Malformed HTTP request (missing header/body separator)")
-
-    lines = header_blob.split(b"\r\n")
-    if not lines:
-        raise ValueError("Empty request")
-
-    request_line = lines[0].decode("utf-8", errors="replace")
-    parts = request_line.split()
-    if len(parts) != 3:
-        raise ValueError(f"Bad request line: {request_line}")
-
-    method, target, version = parts
-    if not version.startswith("HTTP/"):
-        raise ValueError(f"Bad HTTP version: {version}")
-
-    headers = {}
-    for line in lines[1:]:
-        s = line.decode("utf-8", errors="replace")
-        if ":" not in s:
-            continue
-        k, v = s.split(":", 1)
-        headers[k.strip().lower()] = v.strip()
-
-    parsed = urlparse(target)
-    path = parsed.path
-    query = {k: v for k, v in parse_qs(parsed.query).items()}  # values are lists
-    return method.upper(), path, query, headers, body
-
-def read_exact(sock: socket.socket, n: int) -> bytes:
-    chunks = []
-    remaining = n
-    while remaining > 0:
-        chunk = sock.recv(min(remaining, 4096))
-        if not chunk:
-            break
-        chunks.append(chunk)
-        remaining -= len(chunk)
-    return b"".join(chunks)
-
-def recv_http(sock: socket.socket) -> bytes:
-    """
-    Reads until headers arrive, then reads body according to Content-Length (if present).
-    """
-    data = b""
-    # read until header separator
-    while b"\r\n\r\n" not in data:
-        chunk = sock.recv(4096)
-        if not chunk:
-            break
-        data += chunk
-        if len(data) > 2_000_000:
-            raise ValueError("Request too large")
-
-    if b"\r\n\r\n" not in data:
-        return data  # might be incomplete, but we'll let parser fail
-
-    header_blob, rest = data.split(b"\r\n\r\n", 1)
-    headers_lines = header_blob.split(b"\r\n")[1:]
-    headers = {}
-    for line in headers_lines:
-        s = line.decode("utf-8", errors="replace")
-        if ":" in s:
-            k, v = s.split(":", 1)
-            headers[k.strip().lower()] = v.strip()
-
-    cl = headers.get("content-length")
-    if cl is None:
-        return data  # no body expected
-
-    try:
-        length = int(cl)
-    except ValueError:
-        raise ValueError("Invalid Content-Length")
-
-    missing = length - len(rest)
-    if missing > 0:
-        rest += read_exact(sock, missing)
-
-    return header_blob + b"\r\n\r\n" + rest
-
-# ---------- Router ----------
-
-def route(method: str, path: str):
-    """
-    returns handler function or None
-    supports:
-      GET  /                  -> HTML home
-      GET  /health            -> JSON
-      GET  /todos             -> JSON list
-      POST /todos             -> JSON create {"text": "..."}
-      PATCH /todos/<id>       -> JSON update {"text"?, "done"?}
-      DELETE /todos/<id>      -> 204
-    """
-    if path == "/":
-        if method != "GET": return "METHOD_NOT_ALLOWED", None
-        return "OK", handle_home
-
-    if path == "/health":
-        if method != "GET": return "METHOD_NOT_ALLOWED", None
-        return "OK", handle_health
-
-    if path == "/todos":
-        if method == "GET": return "OK", handle_list_todos
-        if method == "POST": return "OK", handle_create_todo
-        return "METHOD_NOT_ALLOWED", None
-
-    if path.startswith("/todos/"):
-        # dynamic segment
-        try:
-            todo_id = int(path.split("/", 2)[2])
-        except Exception:
-            return "NOT_FOUND", None
-
-        if method == "PATCH":
-            return "OK", lambda req: handle_patch_todo(req, todo_id)
-        if method == "DELETE":
-            return "OK", lambda req: handle_delete_todo(req, todo_id)
-        return "METHOD_NOT_ALLOWED", None
-
-    return "NOT_FOUND", None
-
-# ---------- Handlers ----------
-
-def handle_home(req):
-    body = f"""<!doctype html>
-<html>
-<head><meta charset="utf-8"><title>Mini Server</title></head>
-<body style="font-family: system-ui; max-width: 720px; margin: 40px auto;">
-  <h1>Mini HTTP Server ✅</h1>
-  <p>This is a tiny HTTP server built with <code>socket</code> + a small router.</p>
-
-  <h2>Endpoints</h2>
-  <ul>
-    <li><code>GET /health</code></li>
-    <li><code>GET /todos</code></li>
-    <li><code>POST /todos</code> JSON: <code>{{"text":"..."}}</code></li>
-    <li><code>PATCH /todos/&lt;id&gt;</code> JSON: <code>{{"text"?: "...", "done"?: true}}</code></li>
-    <li><code>DELETE /todos/&lt;id&gt;</code></li>
-  </ul>
-
-  <h2>Try quickly</h2>
-  <pre>
-curl http://{HOST}:{PORT}/health
-curl http://{HOST}:{PORT}/todos
-curl -X POST http://{HOST}:{PORT}/todos -H "Content-Type: application/json" -d '{{"text":"ship it"}}'
-curl -X PATCH http://{HOST}:{PORT}/todos/1 -H "Content-Type: application/json" -d '{{"done":true}}'
-curl -X DELETE http://{HOST}:{PORT}/todos/1
-  </pre>
-</body>
-</html>"""
-    return http_response(200, body.encode("utf-8"), {"Content-Type": "text/html; charset=utf-8"})
-
-def handle_health(req):
-    uptime = time.time() - STATE["started_at"]
-    return json_response(200, {"status": "ok", "uptime_seconds": round(uptime, 2), "todos": len(STATE["todos"])})
-
-def handle_list_todos(req):
-    # Optional query: ?done=true/false
-    query = req["query"]
-    todos = STATE["todos"]
-
-    if "done" in query:
-        val = query["done"][0].lower()
-        if val in ("true", "1", "yes"):
-            todos = [t for t in todos if t["done"]]
-        elif val in ("false", "0", "no"):
-            todos = [t for t in todos if not t["done"]]
-
-    return json_response(200, {"todos": todos})
-
-def handle_create_todo(req):
-    if req["headers"].get("content-type", "").startswith("application/json") is False:
-        return json_response(422, {"error": "Expected Content-Type: application/json"})
-
-    try:
-        payload = json.loads(req["body"] or b"{}")
-    except json.JSONDecodeError:
-        return json_response(400, {"error": "Invalid JSON"})
-
-    text = (payload.get("text") or "").strip()
-    if not text:
-        return json_response(422, {"error": "Field 'text' is required"})
-
-    todo = {"id": STATE["next_id"], "text": text, "done": False, "created_at": time.time()}
-    STATE["next_id"] += 1
-    STATE["todos"].append(todo)
-    return json_response(201, todo)
-
-def handle_patch_todo(req, todo_id: int):
-    if req["headers"].get("content-type", "").startswith("application/json") is False:
-        return json_response(422, {"error": "Expected Content-Type: application/json"})
-
-    todo = next((t for t in STATE["todos"] if t["id"] == todo_id), None)
-    if not todo:
-        return json_response(404, {"error": "Todo not found"})
-
-    try:
-        payload = json.loads(req["body"] or b"{}")
-    except json.JSONDecodeError:
-        return json_response(400, {"error": "Invalid JSON"})
-
-    if "text" in payload:
-        new_text = (payload.get("text") or "").strip()
-        if not new_text:
-            return json_response(422, {"error": "Field 'text' cannot be empty"})
-        todo["text"] = new_text
-
-    if "done" in payload:
-        if not isinstance(payload["done"], bool):
-            return json_response(422, {"error": "Field 'done' must be boolean"})
-        todo["done"] = payload["done"]
-
-    return json_response(200, todo)
-
-def handle_delete_todo(req, todo_id: int):
-    idx = next((i for i, t in enumerate(STATE["todos"]) if t["id"] == todo_id), None)
-    if idx is None:
-        return json_response(404, {"error": "Todo not found"})
-    STATE["todos"].pop(idx)
-    return http_response(204, b"")
-
-# ---------- Server loop ----------
-
-def handle_client(conn: socket.socket, addr):
-    try:
-        raw = recv_http(conn)
-        method, path, query, headers, body = parse_request(raw)
-
-        req = {"method": method, "path": path, "query": query, "headers": headers, "body": body}
-        status, handler = route(method, path)
-
-        if status == "NOT_FOUND":
-            conn.sendall(json_response(404, {"error": "Not found"}))
-            return
-        if status == "METHOD_NOT_ALLOWED":
-            conn.sendall(json_response(405, {"error": "Method not allowed"}))
-            return
-
-        resp = handler(req)
-        conn.sendall(resp)
-
-    except Exception as e:
-        # Keep error simple for client; print traceback for dev.
-        traceback.print_exc()
-        conn.sendall(json_response(500, {"error": "Internal server error", "detail": str(e)}))
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
-
-def serve_forever():
-    print(f"Serving on http://{HOST}:{PORT}  (Ctrl+C to stop)")
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.bind((HOST, PORT))
-        s.listen(50)
-
-        while True:
-            conn, addr = s.accept()
-            t = threading.Thread(target=handle_client, args=(conn, addr), daemon=True)
-            t
+#!/usr/bin/env python3
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - stdlib event loop fallback
+    uvloop = None
+import asyncio
+import queue
+import re
+import socket
+import sys
+import threading
+import time
+import traceback
+
+HOST = "127.0.0.1"
+PORT = 8080
+
+class Todo:
+    # __slots__ keeps per-item memory well below a 4-key dict and makes
+    # field access an offset load instead of a hash lookup.
+    __slots__ = ("id", "text", "done", "created_at")
+
+    def __init__(self, id: int, text: str):
+        self.id = id
+        self.text = text
+        self.done = False
+        self.created_at = time.time()
+
+    def to_json(self) -> bytes:
+        # The schema is fixed, so emit it directly instead of building a dict
+        # and running a generic serializer; only the text needs escaping.
+        return b'{"id":%d,"text":%s,"done":%s,"created_at":%.6f}' % (
+            self.id,
+            json_dumps_compact(self.text),
+            b"true" if self.done else b"false",
+            self.created_at,
+        )
+
+# Simple in-memory store (resets on restart)
+STATE = {
+    "todos": [],   # list of Todo, in creation order
+    "by_id": {},   # id -> Todo, same objects as in "todos"; O(1) lookup for PATCH/DELETE
+    "next_id": 1,
+    "started_at": time.time(),
+}
+
+# Guards STATE mutations across worker threads. Held only for the critical
+# section itself, never around JSON work.
+_STATE_LOCK = threading.Lock()
+
+# ---------- HTTP helpers ----------
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+}
+
+# Status line + invariant headers are fixed per status code; encode them once.
+STATUS_LINES = {
+    code: f"HTTP/1.1 {code} {reason}\r\nServer: mini-server\r\nConnection: close\r\n".encode()
+    for code, reason in REASONS.items()
+}
+
+# Only three response shapes exist here (JSON, the HTML home page, and the
+# empty 204), so each gets a specialized builder whose invariant headers are
+# pre-encoded; runtime work is appending Content-Length. All builders return
+# (header_bytes, body_bytes) so the sender can do a vectored write instead of
+# concatenating head + body into a third buffer.
+_JSON_HEAD = {
+    code: line + b"Content-Type: application/json; charset=utf-8\r\nContent-Length: "
+    for code, line in STATUS_LINES.items()
+}
+_HTML_HEAD = STATUS_LINES[200] + b"Content-Type: text/html; charset=utf-8\r\nContent-Length: "
+
+def _json_response_bytes(status: int, body: bytes) -> tuple[bytes, bytes]:
+    return _JSON_HEAD[status] + str(len(body)).encode() + b"\r\n\r\n", body
+
+def _html_response(body: bytes) -> tuple[bytes, bytes]:
+    return _HTML_HEAD + str(len(body)).encode() + b"\r\n\r\n", body
+
+RESP_204 = (STATUS_LINES[204] + b"Content-Length: 0\r\n\r\n", b"")
+
+def send_response(writer: asyncio.StreamWriter, resp: tuple[bytes, bytes]) -> None:
+    # Two writes onto the transport buffer: still no header+body concatenation.
+    header, body = resp
+    writer.write(header)
+    if body:
+        writer.write(body)
+
+def json_dumps(obj) -> bytes:
+    # orjson serializes straight to bytes (no separate .encode pass) and is
+    # much faster than stdlib json; fall back when it isn't installed.
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+def json_dumps_compact(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def json_loads(data: bytes):
+    # orjson accepts bytes directly, so no decode step either.
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_response(status: int, obj) -> tuple[bytes, bytes]:
+    return _json_response_bytes(status, json_dumps(obj))
+
+# ASCII-only case fold for header names (all HTTP/1.1 allows): a single
+# table-driven C pass over the buffer.
+_LOWER_TABLE = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+
+# Cap on the whole request (request line + headers + body).
+MAX_REQUEST_BYTES = 2_000_000
+
+async def recv_http(reader: asyncio.StreamReader):
+    """
+    Reads and parses one HTTP/1.1 request in a single pass off the stream
+    (no repeated bytes concatenation, no double header parse). The body is
+    returned as the single buffer readexactly produced and handed to the JSON
+    parser as-is, so no slice copies are made along the way.
+    Returns: method, path, query_dict, headers_dict, body_bytes
+    """
+    raw_line = await reader.readline()
+    request_line = raw_line.decode("utf-8", errors="replace")
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise ValueError(f"Bad request line: {request_line!r}")
+
+    method, target, version = parts
+    if not version.startswith("HTTP/"):
+        raise ValueError(f"Bad HTTP version: {version}")
+
+    # Header names/values stay as bytes: bytes.strip/lower are C loops and we
+    # skip a UTF-8 decode per line. Keys are lowercased bytes.
+    total = len(raw_line)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        total += len(line)
+        if total > MAX_REQUEST_BYTES:
+            raise ValueError("Request too large")
+        k, sep, v = line.partition(b":")
+        if not sep:
+            continue
+        headers[k.strip().translate(_LOWER_TABLE)] = v.strip()
+
+    try:
+        length = int(headers.get(b"content-length", b"0"))
+    except ValueError:
+        raise ValueError("Invalid Content-Length")
+    if total + length > MAX_REQUEST_BYTES:
+        raise ValueError("Request too large")
+    body = await reader.readexactly(length) if length > 0 else b""
+
+    # Our API only uses simple key=value pairs, so skip urllib.parse's
+    # general-purpose machinery; query values are plain strings.
+    path, _, q = target.partition("?")
+    query = dict(p.split("=", 1) for p in q.split("&") if "=" in p) if q else {}
+    return method.upper(), path, query, headers, body
+
+# ---------- Handlers ----------
+
+# Error payloads with constant bodies, encoded once at import time.
+RESP_NOT_FOUND = json_response(404, {"error": "Not found"})
+RESP_METHOD_NOT_ALLOWED = json_response(405, {"error": "Method not allowed"})
+RESP_BAD_CT = json_response(422, {"error": "Expected Content-Type: application/json"})
+RESP_BAD_JSON = json_response(400, {"error": "Invalid JSON"})
+RESP_EMPTY_TEXT = json_response(422, {"error": "Field 'text' is required"})
+RESP_TEXT_NOT_EMPTY = json_response(422, {"error": "Field 'text' cannot be empty"})
+RESP_BAD_DONE = json_response(422, {"error": "Field 'done' must be boolean"})
+RESP_404_TODO = json_response(404, {"error": "Todo not found"})
+RESP_500 = json_response(500, {"error": "Internal server error"})
+
+def _build_home_response() -> tuple[bytes, bytes]:
+    body = f"""<!doctype html>
+<html>
+<head><meta charset="utf-8"><title>Mini Server</title></head>
+<body style="font-family: system-ui; max-width: 720px; margin: 40px auto;">
+  <h1>Mini HTTP Server ✅</h1>
+  <p>This is a tiny HTTP server built with <code>socket</code> + a small router.</p>
+
+  <h2>Endpoints</h2>
+  <ul>
+    <li><code>GET /health</code></li>
+    <li><code>GET /todos</code></li>
+    <li><code>POST /todos</code> JSON: <code>{{"text":"..."}}</code></li>
+    <li><code>PATCH /todos/&lt;id&gt;</code> JSON: <code>{{"text"?: "...", "done"?: true}}</code></li>
+    <li><code>DELETE /todos/&lt;id&gt;</code></li>
+  </ul>
+
+  <h2>Try quickly</h2>
+  <pre>
+curl http://{HOST}:{PORT}/health
+curl http://{HOST}:{PORT}/todos
+curl -X POST http://{HOST}:{PORT}/todos -H "Content-Type: application/json" -d '{{"text":"ship it"}}'
+curl -X PATCH http://{HOST}:{PORT}/todos/1 -H "Content-Type: application/json" -d '{{"done":true}}'
+curl -X DELETE http://{HOST}:{PORT}/todos/1
+  </pre>
+</body>
+</html>"""
+    return _html_response(body.encode("utf-8"))
+
+# The home page is a pure function of HOST/PORT, so build it once at import
+# time instead of re-rendering the f-string on every GET /.
+HOME_RESPONSE = _build_home_response()
+
+def handle_home(req):
+    return HOME_RESPONSE
+
+def handle_health(req):
+    uptime = time.time() - STATE["started_at"]
+    return json_response(200, {"status": "ok", "uptime_seconds": round(uptime, 2), "todos": len(STATE["todos"])})
+
+def handle_list_todos(req):
+    # Optional query: ?done=true/false
+    query = req["query"]
+    todos = STATE["todos"]
+
+    if "done" in query:
+        val = query["done"].lower()
+        if val in ("true", "1", "yes"):
+            todos = [t for t in todos if t.done]
+        elif val in ("false", "0", "no"):
+            todos = [t for t in todos if not t.done]
+
+    # Serialize item by item and join, rather than materializing one big
+    # indented document; compact output keeps the body small for large lists.
+    return _json_response_bytes(200, b'{"todos":[' + b",".join(t.to_json() for t in todos) + b"]}")
+
+def _require_json(req):
+    """
+    Validates the Content-Type and parses the body.
+    Returns (payload, None) on success or (None, error_response) to send.
+    """
+    ct = req["headers"].get(b"content-type")
+    if not ct or not ct.startswith(b"application/json"):
+        return None, RESP_BAD_CT
+    try:
+        return json_loads(req["body"] or b"{}"), None
+    except ValueError:
+        return None, RESP_BAD_JSON
+
+def handle_create_todo(req):
+    payload, err = _require_json(req)
+    if err is not None:
+        return err
+
+    text = (payload.get("text") or "").strip()
+    if not text:
+        return RESP_EMPTY_TEXT
+
+    todo = Todo(0, text)
+    with _STATE_LOCK:
+        todo.id = STATE["next_id"]
+        STATE["next_id"] += 1
+        STATE["todos"].append(todo)
+        STATE["by_id"][todo.id] = todo
+    return _json_response_bytes(201, todo.to_json())
+
+def handle_patch_todo(req, todo_id: int):
+    payload, err = _require_json(req)
+    if err is not None:
+        return err
+
+    todo = STATE["by_id"].get(todo_id)
+    if not todo:
+        return RESP_404_TODO
+
+    if "text" in payload:
+        new_text = (payload.get("text") or "").strip()
+        if not new_text:
+            return RESP_TEXT_NOT_EMPTY
+
+    if "done" in payload and not isinstance(payload["done"], bool):
+        return RESP_BAD_DONE
+
+    with _STATE_LOCK:
+        if "text" in payload:
+            todo.text = new_text
+        if "done" in payload:
+            todo.done = payload["done"]
+
+    return _json_response_bytes(200, todo.to_json())
+
+def handle_delete_todo(req, todo_id: int):
+    with _STATE_LOCK:
+        todo = STATE["by_id"].pop(todo_id, None)
+        if todo is None:
+            return RESP_404_TODO
+        STATE["todos"].remove(todo)
+    return RESP_204
+
+# ---------- Router ----------
+
+# The route table is fixed, so compile it once: a hash lookup for static
+# paths and a single precompiled regex for the /todos/<id> segment.
+STATIC_ROUTES = {
+    ("GET", "/"): handle_home,
+    ("GET", "/health"): handle_health,
+    ("GET", "/todos"): handle_list_todos,
+    ("POST", "/todos"): handle_create_todo,
+}
+STATIC_METHODS = {"/": {"GET"}, "/health": {"GET"}, "/todos": {"GET", "POST"}}
+_TODO_RE = re.compile(r"^/todos/(\d+)$")
+_TODO_HANDLERS = {"PATCH": handle_patch_todo, "DELETE": handle_delete_todo}
+
+def route(method: str, path: str):
+    """
+    returns ("OK", handler) / ("METHOD_NOT_ALLOWED", None) / ("NOT_FOUND", None)
+    supports:
+      GET  /                  -> HTML home
+      GET  /health            -> JSON
+      GET  /todos             -> JSON list
+      POST /todos             -> JSON create {"text": "..."}
+      PATCH /todos/<id>       -> JSON update {"text"?, "done"?}
+      DELETE /todos/<id>      -> 204
+    """
+    handler = STATIC_ROUTES.get((method, path))
+    if handler is not None:
+        return "OK", handler
+
+    if path in STATIC_METHODS:
+        return "METHOD_NOT_ALLOWED", None
+
+    m = _TODO_RE.match(path)
+    if m is not None:
+        dyn = _TODO_HANDLERS.get(method)
+        if dyn is None:
+            return "METHOD_NOT_ALLOWED", None
+        todo_id = int(m.group(1))
+        return "OK", lambda req: dyn(req, todo_id)
+
+    return "NOT_FOUND", None
+
+# ---------- Server loop ----------
+
+# Tracebacks are formatted and written by a single background thread, so an
+# error storm doesn't serialize request handling on stderr I/O.
+_LOG_Q = queue.SimpleQueue()
+
+def _logger():
+    while True:
+        etype, evalue, etb = _LOG_Q.get()
+        traceback.print_exception(etype, evalue, etb)
+
+threading.Thread(target=_logger, daemon=True).start()
+
+async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            # Disable Nagle so small responses aren't held back waiting for
+            # an ACK, and let the kernel reap dead peers.
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        method, path, query, headers, body = await recv_http(reader)
+
+        req = {"method": method, "path": path, "query": query, "headers": headers, "body": body}
+        status, handler = route(method, path)
+
+        if status == "NOT_FOUND":
+            send_response(writer, RESP_NOT_FOUND)
+        elif status == "METHOD_NOT_ALLOWED":
+            send_response(writer, RESP_METHOD_NOT_ALLOWED)
+        else:
+            # Handlers are synchronous CPU-bound functions; only the socket
+            # I/O around them is async.
+            send_response(writer, handler(req))
+        await writer.drain()
+
+    except Exception:
+        # Keep the error generic for the client; log the traceback off-path.
+        _LOG_Q.put(sys.exc_info())
+        try:
+            send_response(writer, RESP_500)
+            await writer.drain()
+        except Exception:
+            pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+async def _main():
+    server = await asyncio.start_server(
+        handle_client,
+        HOST,
+        PORT,
+        backlog=1024,
+        reuse_port=hasattr(socket, "SO_REUSEPORT"),
+    )
+    print(f"Serving on http://{HOST}:{PORT}  (Ctrl+C to stop)")
+    async with server:
+        await server.serve_forever()
+
+def serve_forever():
+    # One event loop instead of a thread per socket blocked in recv;
+    # uvloop speeds it up further when installed.
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(_main())
+
+if __name__ == "__main__":
+    serve_forever()